@@ -0,0 +1,51 @@
+"""
+Helpers for the bench_dayXX.py scripts: each measurement runs in a forked
+child process, so that its peak RSS isn't polluted by earlier runs.
+"""
+from typing import Any, Callable, Tuple
+import multiprocessing
+import resource
+import time
+
+
+def _run(conn, fn: Callable, args: tuple) -> None:
+    try:
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        # ru_maxrss is in kilobytes on linux
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        conn.send((None, (result, seconds, peak_mb)))
+    except BaseException as e:
+        conn.send((e, None))
+    finally:
+        conn.close()
+
+
+def measure(fn: Callable, *args: Any) -> Tuple[Any, float, float]:
+    """
+    Returns (result, seconds, peak RSS in MB) of fn(*args) run in a child process.
+    Re-raises anything fn raises, and raises RuntimeError if the child dies
+    without answering (e.g. it was OOM-killed).
+    """
+    ctx = multiprocessing.get_context('fork')
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run, args=(child, fn, args))
+    process.start()
+    # so that recv sees EOF if the child dies
+    child.close()
+    try:
+        error, result = parent.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"benchmark process died with exit code {process.exitcode}")
+    finally:
+        parent.close()
+    process.join()
+    if error is not None:
+        raise error
+    return result
+
+
+def report(name: str, items: int, seconds: float, peak_mb: float, unit: str = "items") -> None:
+    print(f"{name:<24} {seconds:8.2f}s {items / seconds:>14,.0f} {unit}/sec {peak_mb:10.1f} MB peak RSS")
@@ -0,0 +1,64 @@
+"""
+Compares the list, streaming and (if numpy is installed) vectorized
+versions of count_increases on a
+generated depths file. The default is 10 million depths (about 70MB),
+pass a bigger count (e.g. 500000000 for several GB) to see the list
+version's memory grow while the streaming version's stays flat:
+
+    python bench_day01.py 500000000
+"""
+import os
+import random
+import sys
+import tempfile
+
+from bench import measure, report
+from day01 import (count_increases, count_increases_streaming, read_depths,
+                   load_depths, count_increases_vectorized, np)
+
+
+def generate(path: str, n: int, chunk: int = 1_000_000) -> None:
+    rng = random.Random(0)
+    depth = 1000
+    with open(path, 'w') as f:
+        for start in range(0, n, chunk):
+            lines = []
+            for _ in range(min(chunk, n - start)):
+                depth += rng.randint(-5, 6)
+                lines.append(str(depth))
+            f.write('\n'.join(lines))
+            f.write('\n')
+
+
+def with_list(path: str, gap: int) -> int:
+    with open(path) as f:
+        depths = [int(x) for x in f.read().split()]
+    return count_increases(depths, gap)
+
+
+def with_streaming(path: str, gap: int) -> int:
+    with open(path) as f:
+        return count_increases_streaming(read_depths(f), gap)
+
+
+def with_vectorized(path: str, gap: int) -> int:
+    return count_increases_vectorized(load_depths(path), gap)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'depths.txt')
+        generate(path, n)
+        print(f"{n:,} depths, {os.path.getsize(path) / 2 ** 20:.0f}MB")
+
+        for gap in (1, 3):
+            results = set()
+            variants = [("list", with_list), ("streaming", with_streaming)]
+            if np is not None:
+                variants.append(("vectorized", with_vectorized))
+            for name, fn in variants:
+                result, seconds, peak_mb = measure(fn, path, gap)
+                results.add(result)
+                report(f"{name} (gap={gap})", n, seconds, peak_mb, "depths")
+            assert len(results) == 1
@@ -0,0 +1,31 @@
+"""
+Compares the Counter and bit-matrix engines of power_consumption
+on a generated diagnostic report. The defaults are 1 million 32-bit
+words; pass the number of words and their width to change them:
+
+    python bench_day03.py 5000000 64
+"""
+import random
+import sys
+
+from bench import measure, report
+from day03 import power_consumption
+
+
+def generate(n: int, m: int) -> list:
+    rng = random.Random(0)
+    return [format(rng.getrandbits(m), f'0{m}b') for _ in range(n)]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    numbers = generate(n, m)
+    print(f"{n:,} words of {m} bits")
+
+    results = set()
+    for engine in ("counter", "bits"):
+        result, seconds, peak_mb = measure(power_consumption, numbers, engine)
+        results.add(result)
+        report(engine, n, seconds, peak_mb, "words")
+    assert len(results) == 1
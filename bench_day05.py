@@ -0,0 +1,61 @@
+"""
+Compares the Counter and dense grid versions of count_vents
+on generated long lines (horizontal, vertical and diagonal) in a
+1000 x 1000 area. The default is 100,000 lines:
+
+    python bench_day05.py 200000
+
+Then checks that count_vents_sweep scales with the number of lines
+(rather than its square) when no lines cross: n long horizontal lines
+far above n short vertical lines.
+"""
+import random
+import sys
+
+from bench import measure, report
+from day05 import Line, Point, count_vents, count_vents_grid, count_vents_sweep
+
+SIZE = 1000
+
+
+def generate(n: int) -> list:
+    rng = random.Random(0)
+    lines = []
+    for _ in range(n):
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        dx, dy = rng.choice([(1, 0), (0, 1), (1, 1), (1, -1)])
+        # as long as possible without leaving the area
+        steps = [SIZE - 1 - x if dx else SIZE, SIZE - 1 - y if dy == 1 else y if dy == -1 else SIZE]
+        length = rng.randint(0, min(steps))
+        lines.append(Line(Point(x, y), Point(x + dx * length, y + dy * length)))
+    return lines
+
+
+def far_apart(n: int) -> list:
+    return ([Line(Point(0, 10 ** 6 + i), Point(10 ** 6, 10 ** 6 + i)) for i in range(n)] +
+            [Line(Point(100 * i, 0), Point(100 * i, 10)) for i in range(n)])
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lines = generate(n)
+    cells = sum(line.steps()[2] for line in lines)
+    print(f"{n:,} lines covering {cells:,} cells")
+
+    for hv_only in (True, False):
+        results = set()
+        for name, fn in [("counter", count_vents), ("grid", count_vents_grid)]:
+            result, seconds, peak_mb = measure(fn, lines, hv_only)
+            results.add(result)
+            report(f"{name} (hv_only={hv_only})", n, seconds, peak_mb, "lines")
+        assert len(results) == 1
+
+
+    timings = []
+    for n in (2000, 8000):
+        result, seconds, peak_mb = measure(count_vents_sweep, far_apart(n), False)
+        assert result == 0
+        timings.append(seconds)
+        report("sweep, no crossings", 2 * n, seconds, peak_mb, "lines")
+    # 4x the lines: about 4x the time for a sweep, 16x for a quadratic scan
+    assert timings[1] < 8 * timings[0], "count_vents_sweep looks quadratic"
@@ -0,0 +1,56 @@
+"""
+Compares simulating many lantern fish populations one LanternFish at a
+time against LanternFishBatch, both stepping day by day and fast
+forwarding. The default is 100,000 populations for 256 days:
+
+    python bench_day06.py 100000 256
+"""
+import random
+import sys
+
+from bench import measure, report
+from day06 import LanternFish, LanternFishBatch
+
+
+def generate(n: int) -> list:
+    rng = random.Random(0)
+    return [[rng.randint(0, 6) for _ in range(rng.randint(1, 300))] for _ in range(n)]
+
+
+def one_at_a_time(populations: list, days: int) -> list:
+    counts = []
+    for timers in populations:
+        lf = LanternFish(timers)
+        for _ in range(days):
+            lf.step()
+        counts.append(lf.count())
+    return counts
+
+
+def batch_steps(populations: list, days: int) -> list:
+    batch = LanternFishBatch(populations)
+    for _ in range(days):
+        batch.step()
+    return batch.counts()
+
+
+def batch_fast_forward(populations: list, days: int) -> list:
+    batch = LanternFishBatch(populations)
+    batch.fast_forward(days)
+    return batch.counts()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    populations = generate(n)
+    print(f"{n:,} populations, {days} days")
+
+    results = []
+    for name, fn in [("one at a time", one_at_a_time),
+                     ("batch step", batch_steps),
+                     ("batch fast_forward", batch_fast_forward)]:
+        result, seconds, peak_mb = measure(fn, populations, days)
+        results.append(result)
+        report(name, n, seconds, peak_mb, "populations")
+    assert all(result == results[0] for result in results)
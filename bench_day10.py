@@ -0,0 +1,55 @@
+"""
+Compares scoring lines with score + median_completion_score (which scan
+most lines three times and sort the completion scores) against the fused
+syntax_scores scanner, on generated, deeply nested lines. The default
+is 1 million lines:
+
+    python bench_day10.py 2000000
+"""
+import random
+import sys
+
+from bench import measure, report
+from day10 import OC, scan, score, median_completion_score, syntax_scores
+
+
+def generate(n: int) -> list:
+    rng = random.Random(0)
+    openers = list(OC)
+    closers = list(OC.values())
+    lines = []
+    for _ in range(n):
+        stack, line = [], []
+        for _ in range(rng.randint(20, 120)):
+            # mostly open, so the nesting gets deep
+            if stack and rng.random() < 0.4:
+                opener = stack.pop()
+                # occasionally close with the wrong bracket
+                line.append(OC[opener] if rng.random() < 0.995 else rng.choice(closers))
+            else:
+                opener = rng.choice(openers)
+                stack.append(opener)
+                line.append(opener)
+        lines.append(''.join(line))
+
+    # the median needs an odd number of incomplete lines
+    if sum(not scan(line)[0] for line in lines) % 2 == 0:
+        lines.append('(')
+    return lines
+
+
+def separately(lines: list) -> tuple:
+    return sum(score(line) for line in lines), median_completion_score(lines)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lines = generate(n)
+    print(f"{len(lines):,} lines, {sum(map(len, lines)):,} characters")
+
+    results = set()
+    for name, fn in [("score + median", separately), ("syntax_scores", syntax_scores)]:
+        result, seconds, peak_mb = measure(fn, lines)
+        results.add(result)
+        report(name, len(lines), seconds, peak_mb, "lines")
+    assert len(results) == 1
@@ -1,4 +1,10 @@
-from typing import List
+from typing import List, Iterable, Iterator, TextIO
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = """199
 200
@@ -26,10 +32,82 @@ assert count_increases(INPUT) == 7
 
 assert count_increases(INPUT, gap=3) == 5
 
+def read_depths(f: TextIO) -> Iterator[int]:
+    """
+    Lazily parses one depth per line from a file handle,
+    skipping blank lines (e.g. a trailing newline).
+    """
+    for line in f:
+        line = line.strip()
+        if line:
+            yield int(line)
+
+def count_increases_streaming(depths: Iterable[int], gap: int = 1) -> int:
+    """
+    Same as count_increases, but consumes any iterable and only
+    ever holds the last `gap` depths in memory.
+    """
+    if gap <= 0:
+        # nothing is ever less than itself
+        return 0
+
+    window = deque(maxlen=gap)
+    count = 0
+    for depth in depths:
+        if len(window) == gap and window[0] < depth:
+            count += 1
+        window.append(depth)
+
+    return count
+
+assert count_increases_streaming([1, 2, 3]) == 2
+assert count_increases_streaming(iter(INPUT)) == 7
+assert count_increases_streaming(iter(INPUT), gap=3) == 5
+assert count_increases_streaming(read_depths(RAW.splitlines())) == 7
+assert all(count_increases_streaming(INPUT, gap=g) == count_increases(INPUT, gap=g)
+           for g in range(0, len(INPUT) + 2))
+
+def load_depths(path: str):
+    """
+    Parses a depths file in one bulk call. Returns a numpy array
+    if numpy is available, otherwise a list.
+    """
+    if np is None:
+        with open(path) as f:
+            return list(read_depths(f))
+    return np.fromfile(path, dtype=np.int64, sep='\n')
+
+def count_increases_vectorized(depths, gap: int = 1) -> int:
+    """
+    Same as count_increases, but compares all the windows at once
+    using numpy. Falls back to count_increases without numpy.
+    """
+    if np is None:
+        return count_increases(list(depths), gap)
+    depths = np.asarray(depths)
+    if gap <= 0 or len(depths) <= gap:
+        return 0
+    return int(np.count_nonzero(depths[gap:] > depths[:-gap]))
+
+assert count_increases_vectorized([1, 2, 3]) == 2
+assert count_increases_vectorized(INPUT) == 7
+assert count_increases_vectorized(INPUT, gap=3) == 5
+assert count_increases_vectorized(INPUT, gap=len(INPUT)) == 0
+assert all(count_increases_vectorized(INPUT, gap=g) == count_increases(INPUT, gap=g)
+           for g in range(0, len(INPUT) + 2))
+
 if __name__ == '__main__':
     with open('data/day01.txt') as f:
         raw = f.read()
     input = [int(x) for x in raw.split('\n')]
     print(count_increases(input))
     print(count_increases(input, gap=3))
-    
\ No newline at end of file
+
+    with open('data/day01.txt') as f:
+        print(count_increases_streaming(read_depths(f)))
+    with open('data/day01.txt') as f:
+        print(count_increases_streaming(read_depths(f), gap=3))
+
+    depths = load_depths('data/day01.txt')
+    print(count_increases_vectorized(depths))
+    print(count_increases_vectorized(depths, gap=3))
@@ -1,4 +1,14 @@
 from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 RAW = """forward 5
@@ -66,7 +76,157 @@ assert POSITION.horizontal == 15
 assert POSITION.depth == 60
 
 
+# Replaying a stream of commands is associative: an AimPosition replayed
+# from the origin summarizes a segment of commands by how much it changes
+# aim and horizontal, and how much it changes depth *assuming it starts
+# with aim 0*. If it actually starts with aim a, the depth changes by an
+# extra a * horizontal.
+
+def combine(first: AimPosition, second: AimPosition) -> AimPosition:
+    """
+    The result of replaying the second segment's commands after the first's,
+    where second was replayed from the origin.
+    """
+    return AimPosition(
+        horizontal=first.horizontal + second.horizontal,
+        depth=first.depth + second.depth + first.aim * second.horizontal,
+        aim=first.aim + second.aim,
+    )
+
+def to_position(aim_position: AimPosition) -> Position:
+    # for part 1, up and down move the depth the way they move the aim
+    return Position(aim_position.horizontal, aim_position.aim)
+
+def summarize(commands: Iterable[Command]) -> AimPosition:
+    summary = AimPosition()
+    for command in commands:
+        summary.move(command)
+    return summary
+
+SUMMARY = combine(summarize(COMMANDS[:3]), summarize(COMMANDS[3:]))
+assert to_position(SUMMARY) == Position(15, 10)
+assert SUMMARY == AimPosition(15, 60, 10)
+for i in range(len(COMMANDS) + 1):
+    assert combine(summarize(COMMANDS[:i]), summarize(COMMANDS[i:])) == summarize(COMMANDS)
+
+
+def chunk_offsets(path: str, num_chunks: int) -> List[Tuple[int, int]]:
+    """
+    Splits a file into (start, end) byte ranges of roughly equal size,
+    with every boundary moved forward to the start of a line.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, num_chunks):
+            f.seek(max(size * i // num_chunks, boundaries[-1]))
+            f.readline()
+            boundaries.append(min(f.tell(), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+def summarize_chunk(path: str, start: int, end: int) -> AimPosition:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode().splitlines()
+    return summarize(Command.from_string(line) for line in lines if line.strip())
+
+def replay_parallel(path: str,
+                    num_workers: Optional[int] = None,
+                    num_chunks: Optional[int] = None) -> Tuple[Position, AimPosition]:
+    """
+    Summarizes chunks of the commands file in a process pool
+    and combines the summaries in order.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    chunks = chunk_offsets(path, num_chunks or 4 * num_workers)
+    summary = AimPosition()
+    with ProcessPoolExecutor(num_workers) as executor:
+        futures = [executor.submit(summarize_chunk, path, start, end) for start, end in chunks]
+        for future in futures:
+            summary = combine(summary, future.result())
+    return to_position(summary), summary
+
+# The pool itself is checked in __main__ below: a pool started while this
+# module is still being imported deadlocks pickling summarize_chunk.
+with tempfile.TemporaryDirectory() as TMP:
+    PATH = os.path.join(TMP, "day02.txt")
+    with open(PATH, "w") as f:
+        f.write(RAW)
+    for num_chunks in range(1, len(RAW)):
+        CHUNKS = chunk_offsets(PATH, num_chunks)
+        assert CHUNKS[0][0] == 0 and CHUNKS[-1][1] == len(RAW)
+        SUMMARY = AimPosition()
+        for start, end in CHUNKS:
+            SUMMARY = combine(SUMMARY, summarize_chunk(PATH, start, end))
+        assert SUMMARY == AimPosition(15, 60, 10)
+
+
+# Columnar encoding: one small int code per direction and one int per
+# distance, rather than one Command object per line.
+
+FORWARD, UP, DOWN = 0, 1, 2
+DIRECTION_CODES = {"forward": FORWARD, "up": UP, "down": DOWN}
+
+def parse_columns(raw: str) -> Tuple[array, array]:
+    directions = array('b')
+    distances = array('q')
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        direction, distance = line.split()
+        try:
+            directions.append(DIRECTION_CODES[direction])
+        except KeyError:
+            raise ValueError(f"Unknown direction {direction}")
+        distances.append(int(distance))
+    return directions, distances
+
+def replay_columns(directions: array, distances: array) -> Tuple[Position, AimPosition]:
+    """
+    Aim is the running sum of the up / down distances, and every forward
+    adds distance * aim to the depth, so the whole replay is a prefix sum
+    and a dot product.
+    """
+    if np is None:
+        horizontal = depth = aim = 0
+        for direction, distance in zip(directions, distances):
+            if direction == FORWARD:
+                horizontal += distance
+                depth += distance * aim
+            elif direction == UP:
+                aim -= distance
+            else:
+                aim += distance
+    else:
+        codes = np.frombuffer(directions, dtype=np.int8)
+        dists = np.frombuffer(distances, dtype=np.int64)
+        # |aim| <= n * max distance, and depth sums n products of a distance and an aim
+        max_distance = max(-int(dists.min()), int(dists.max())) if len(dists) else 0
+        bound = len(dists) * max_distance * len(dists) * max_distance
+        if bound >= 2 ** 63:
+            dists = dists.astype(object)
+        forward = np.where(codes == FORWARD, dists, 0)
+        aims = np.cumsum(np.where(codes == DOWN, dists, 0) - np.where(codes == UP, dists, 0))
+        horizontal = int(forward.sum())
+        depth = int(forward @ aims)
+        aim = int(aims[-1]) if len(aims) else 0
+
+    return Position(horizontal, aim), AimPosition(horizontal, depth, aim)
+
+assert replay_columns(*parse_columns(RAW)) == (Position(15, 10), AimPosition(15, 60, 10))
+assert replay_columns(*parse_columns("")) == (Position(0, 0), AimPosition(0, 0, 0))
+BIG = f"down {2 ** 62}\nforward {2 ** 62}\nforward {2 ** 62}"
+assert replay_columns(*parse_columns(BIG)) == (Position(2 ** 63, 2 ** 62), AimPosition(2 ** 63, 2 ** 125, 2 ** 62))
+
+
 if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "day02.txt")
+        with open(path, "w") as f:
+            f.write(RAW)
+        assert replay_parallel(path, 2, 3) == (Position(15, 10), AimPosition(15, 60, 10))
+
     raw = open("data/day02.txt").read()
     commands = [Command.from_string(s) for s in raw.splitlines()] 
     position = Position(0, 0)
@@ -77,4 +237,12 @@ if __name__ == "__main__":
     position = AimPosition(0, 0)
     for command in commands:
         position.move(command)
-    print(position.horizontal * position.depth)
\ No newline at end of file
+    print(position.horizontal * position.depth)
+
+    position, aim_position = replay_parallel("data/day02.txt")
+    print(position.horizontal * position.depth)
+    print(aim_position.horizontal * aim_position.depth)
+
+    position, aim_position = replay_columns(*parse_columns(raw))
+    print(position.horizontal * position.depth)
+    print(aim_position.horizontal * aim_position.depth)
\ No newline at end of file
@@ -1,6 +1,12 @@
-from typing import List
+from typing import List, Callable
+from bisect import bisect_left
 from collections import Counter
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 RAW = """00100
 11110
 10110
@@ -16,8 +22,34 @@ RAW = """00100
 
 INPUT = RAW.splitlines()
 
-def gamma_rate(numbers: List[str]) -> str:
+def one_counts(numbers: List[str]) -> List[int]:
+    """
+    Counts the number of 1s in each bit column, treating the report
+    as an n x m bit matrix rather than looping over characters in Python.
+    """
+    m = len(numbers[0])
+    if np is not None:
+        bits = np.frombuffer(''.join(numbers).encode(), dtype=np.uint8).reshape(-1, m)
+        return (bits == ord('1')).sum(axis=0).tolist()
+
+    joined = ''.join(numbers)
+    return [joined[i::m].count('1') for i in range(m)]
+
+assert one_counts(INPUT) == [7, 5, 8, 7, 5]
+
+def gamma_rate(numbers: List[str], engine: str = "counter") -> str:
     m = len(numbers[0])
+
+    if engine == "bits":
+        n = len(numbers)
+        # ties go to whichever bit appears first, like Counter.most_common
+        return ''.join(
+            '1' if 2 * ones > n else '0' if 2 * ones < n else numbers[0][i]
+            for i, ones in enumerate(one_counts(numbers))
+        )
+    elif engine != "counter":
+        raise ValueError(f"Unknown engine {engine}")
+
     counts = [
         Counter(number[i] for number in numbers)
         for i in range(m)
@@ -28,22 +60,30 @@ def gamma_rate(numbers: List[str]) -> str:
         for counter in counts
     )
 
-def epsilon_rate(numbers: List[str]) -> str:
-    gr = gamma_rate(numbers)
-    return ''.join('1' if c == '0' else '0' for c in gr)
+def flip_bits(bits: str) -> str:
+    return ''.join('1' if c == '0' else '0' for c in bits)
+
+def epsilon_rate(numbers: List[str], engine: str = "counter") -> str:
+    return flip_bits(gamma_rate(numbers, engine))
 
 assert gamma_rate(INPUT) == "10110"
 assert epsilon_rate(INPUT) == "01001"
+assert gamma_rate(INPUT, engine="bits") == "10110"
+assert epsilon_rate(INPUT, engine="bits") == "01001"
+assert gamma_rate(["01", "10"], engine="bits") == gamma_rate(["01", "10"]) == "01"
 
-def power_consumption(numbers: List[str]) -> int:
+def power_consumption(numbers: List[str], engine: str = "counter") -> int:
     """
     Computes the gamma rate and epsilon rate,
     converts them to base 10, and returns their product.
     """
-    return int(gamma_rate(numbers), 2) * int(epsilon_rate(numbers), 2)
+    gr = gamma_rate(numbers, engine)
+    er = flip_bits(gr)
+    return int(gr, 2) * int(er, 2)
 
 
 assert power_consumption(INPUT) == 198
+assert power_consumption(INPUT, engine="bits") == 198
 
 
 def oxygen_generator_rating(numbers: List[str]) -> str:
@@ -106,8 +146,56 @@ def life_support_rating(numbers: List[str]) -> int:
 assert life_support_rating(INPUT) == 230
 
 
+class ReportIndex:
+    """
+    Keeps the report sorted, so that the numbers sharing any prefix
+    form a contiguous range, and the 0s / 1s at the next bit
+    split that range at a point we can find with bisect.
+    """
+    def __init__(self, numbers: List[str]) -> None:
+        self.numbers = sorted(numbers)
+        self.m = len(numbers[0])
+
+    def _find(self, keep_ones: Callable[[int, int], bool]) -> str:
+        lo, hi = 0, len(self.numbers)
+
+        for i in range(self.m):
+            prefix = self.numbers[lo][:i]
+            mid = bisect_left(self.numbers, prefix + '1', lo, hi)
+            zeros, ones = mid - lo, hi - mid
+
+            if keep_ones(zeros, ones):
+                lo = mid
+            else:
+                hi = mid
+
+            if hi - lo == 1:
+                return self.numbers[lo]
+            elif hi == lo:
+                break
+
+        raise ValueError("No solution found")
+
+    def oxygen_generator_rating(self) -> str:
+        return self._find(lambda zeros, ones: ones >= zeros)
+
+    def co2_scrubber_rating(self) -> str:
+        return self._find(lambda zeros, ones: zeros > ones)
+
+    def life_support_rating(self) -> int:
+        return int(self.oxygen_generator_rating(), 2) * int(self.co2_scrubber_rating(), 2)
+
+
+INDEX = ReportIndex(INPUT)
+assert INDEX.oxygen_generator_rating() == "10111"
+assert INDEX.co2_scrubber_rating() == "01010"
+assert INDEX.life_support_rating() == 230
+
+
 
 if __name__ == "__main__":
     numbers = open('data/day03.txt').read().splitlines()
     print(power_consumption(numbers))
-    print(life_support_rating(numbers))
\ No newline at end of file
+    print(power_consumption(numbers, engine="bits"))
+    print(life_support_rating(numbers))
+    print(ReportIndex(numbers).life_support_rating())
\ No newline at end of file
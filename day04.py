@@ -1,4 +1,10 @@
-from typing import List
+from typing import List, Dict, Tuple
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = """7,4,9,5,11,17,23,2,0,14,21,24,10,16,13,6,15,25,12,22,18,20,8,19,3,26,1
 
@@ -30,28 +36,29 @@ class Board:
         self.row_counts = [0 for _ in range(self.nr)]
         self.col_counts = [0 for _ in range(self.nc)]
 
+        # number -> the cells that contain it, so marking doesn't scan the grid
+        self.cells: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for i, row in enumerate(grid):
+            for j, entry in enumerate(row):
+                self.cells[entry].append((i, j))
+
+        self.unmarked_sum = sum(entry for row in grid for entry in row)
+        self.won = False
+
     def mark(self, number: int) -> None:
-        for i in range(self.nr):
-            for j in range(self.nc):
-                if self.grid[i][j] == number:
-                    self.row_counts[i] += 1
-                    self.col_counts[j] += 1
-                    self.grid[i][j] = -1  # bad, bad, bad
+        for i, j in self.cells.pop(number, ()):
+            self.row_counts[i] += 1
+            self.col_counts[j] += 1
+            self.unmarked_sum -= number
+            if self.row_counts[i] == self.nc or self.col_counts[j] == self.nr:
+                self.won = True
 
     def is_winner(self) -> bool:
-        if any(rc == self.nc for rc in self.row_counts):
-            return True
-        if any(cc == self.nr for cc in self.col_counts):
-            return True
-        else:
-            return False
+        return self.won
 
     def score(self, number: int) -> int:
         """Return the score of the board"""
-        return number * sum(entry 
-                            for row in self.grid 
-                            for entry in row 
-                            if entry != -1)
+        return number * self.unmarked_sum
 
     @staticmethod
     def parse(raw: str) -> 'Board':
@@ -66,10 +73,17 @@ class Game:
         self.numbers = numbers
         self.boards = boards
 
+        # number -> the boards that contain it (in board order),
+        # so each draw only touches the boards it affects
+        self.boards_with: Dict[int, List[Board]] = defaultdict(list)
+        for board in boards:
+            for number in board.cells:
+                self.boards_with[number].append(board)
+
     def play(self) -> int:
         """Play the game and return the final score of the winning board"""
         for number in self.numbers:
-            for board in self.boards:
+            for board in self.boards_with.get(number, ()):
                 board.mark(number)
                 if board.is_winner():
                     return board.score(number)
@@ -80,18 +94,20 @@ class Game:
         Play the game until only one board is left
         Return its score when it wins
         """
+        remaining = sum(not board.is_winner() for board in self.boards)
+
         for number in self.numbers:
-            to_remove = []
-            for board in self.boards:
+            new_winners = 0
+            for board in self.boards_with.get(number, ()):
+                if board.is_winner():
+                    continue
                 board.mark(number)
-                if board.is_winner() and len(self.boards) == 1:
+                if board.is_winner() and remaining == 1:
                     return board.score(number)
                 elif board.is_winner():
-                    to_remove.append(board)
-                    continue
+                    new_winners += 1
 
-            for board in to_remove:
-                self.boards.remove(board)
+            remaining -= new_winners
 
         raise ValueError("No winner")
 
@@ -115,10 +131,92 @@ SCORE = GAME.play_last()
 assert SCORE == 1924
 
 
+class WinOrder:
+    """
+    Computes every board's winning turn directly instead of simulating:
+    a line is complete at the latest draw of any of its numbers,
+    and a board wins at the earliest of its lines.
+    """
+    def __init__(self, numbers: List[int], grids: List[List[List[int]]]) -> None:
+        self.numbers = numbers
+
+        # only the first draw of a number matters
+        ranks: Dict[int, int] = {}
+        for turn, number in enumerate(numbers):
+            ranks.setdefault(number, turn)
+
+        if np is not None and grids:
+            self.turns, self.scores = self._solve_numpy(ranks, grids)
+        else:
+            self.turns, self.scores = self._solve(ranks, grids)
+
+        # winners sorted by turn, ties going to the earlier board like Game.play
+        never = len(numbers)
+        self.order = sorted((b for b, turn in enumerate(self.turns) if turn < never),
+                            key=lambda b: self.turns[b])
+
+    def _solve(self, ranks: Dict[int, int], grids: List[List[List[int]]]) -> Tuple[List[int], List[int]]:
+        never = len(self.numbers)
+        turns, scores = [], []
+        for grid in grids:
+            rank_grid = [[ranks.get(entry, never) for entry in row] for row in grid]
+            turn = min(min(max(row) for row in rank_grid),
+                       min(max(col) for col in zip(*rank_grid)))
+            unmarked = sum(entry
+                           for row, rank_row in zip(grid, rank_grid)
+                           for entry, rank in zip(row, rank_row)
+                           if rank > turn)
+            turns.append(turn)
+            scores.append(self.numbers[turn] * unmarked if turn < never else 0)
+        return turns, scores
+
+    def _solve_numpy(self, ranks: Dict[int, int], grids: List[List[List[int]]]) -> Tuple[List[int], List[int]]:
+        never = len(self.numbers)
+        boards = np.array(grids, dtype=np.int64)
+        lookup = np.full(max(int(boards.max()), max(ranks, default=0)) + 1, never, dtype=np.int64)
+        lookup[list(ranks)] = list(ranks.values())
+
+        rank_grids = lookup[boards]
+        turns = np.minimum(rank_grids.max(axis=2).min(axis=1),
+                           rank_grids.max(axis=1).min(axis=1))
+        unmarked = (boards * (rank_grids > turns[:, None, None])).sum(axis=(1, 2))
+        numbers = np.append(np.array(self.numbers, dtype=np.int64), 0)
+        scores = numbers[turns] * unmarked
+        return turns.tolist(), scores.tolist()
+
+    @staticmethod
+    def from_game(game: Game) -> 'WinOrder':
+        return WinOrder(game.numbers, [board.grid for board in game.boards])
+
+    def kth_winner(self, k: int) -> int:
+        """Return the score of the k-th board to win (0-indexed, negative from the end)"""
+        try:
+            return self.scores[self.order[k]]
+        except IndexError:
+            raise ValueError("No winner")
+
+    def first_winner(self) -> int:
+        return self.kth_winner(0)
+
+    def last_winner(self) -> int:
+        return self.kth_winner(-1)
+
+
+WIN_ORDER = WinOrder.from_game(Game.parse(RAW))
+assert WIN_ORDER.turns == [13, 14, 11]
+assert WIN_ORDER.first_winner() == 4512
+assert WIN_ORDER.last_winner() == 1924
+assert WIN_ORDER.order == [2, 0, 1]
+
+
 if __name__ == "__main__":
     raw = open('data/day04.txt').read()
     game = Game.parse(raw)
     print(game.play())
 
     game = Game.parse(raw)
-    print(game.play_last())
\ No newline at end of file
+    print(game.play_last())
+
+    win_order = WinOrder.from_game(Game.parse(raw))
+    print(win_order.first_winner())
+    print(win_order.last_winner())
\ No newline at end of file
@@ -1,5 +1,12 @@
-from typing import NamedTuple, Iterator, Iterable
-from collections import Counter
+from typing import NamedTuple, Iterator, Iterable, List, Tuple, Dict, Optional
+from collections import Counter, defaultdict
+from bisect import bisect_left, bisect_right, insort
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = """0,9 -> 5,9
 8,0 -> 0,8
@@ -68,6 +75,15 @@ class Line(NamedTuple):
                 x += 1
                 y += (1 if slopes_up else -1)
  
+    def steps(self) -> Tuple[int, int, int]:
+        """
+        Returns (dx, dy, n) such that the points on the line are
+        start + i * (dx, dy) for i in range(n)
+        """
+        dx = self.end.x - self.start.x
+        dy = self.end.y - self.start.y
+        n = max(abs(dx), abs(dy)) + 1
+        return (dx > 0) - (dx < 0), (dy > 0) - (dy < 0), n
 
     @staticmethod
     def parse(raw: str) -> 'Line':
@@ -84,12 +100,206 @@ def count_vents(lines: Iterable[Line], hv_only=True) -> int:
 
     return sum(count >= 2 for count in counts.values())
 
+def count_vents_grid(lines: Iterable[Line], hv_only=True) -> int:
+    """
+    Same as count_vents, but draws the lines into a dense grid of counts
+    sized to the bounding box of the lines instead of hashing each point.
+    """
+    lines = [line for line in lines
+             if not hv_only or line.is_horizontal() or line.is_vertical()]
+    if not lines:
+        return 0
+
+    x_lo = min(min(line.start.x, line.end.x) for line in lines)
+    y_lo = min(min(line.start.y, line.end.y) for line in lines)
+    width = max(max(line.start.x, line.end.x) for line in lines) - x_lo + 1
+    height = max(max(line.start.y, line.end.y) for line in lines) - y_lo + 1
+
+    if np is not None:
+        grid = np.zeros(width * height, dtype=np.int32)
+        for line in lines:
+            dx, dy, n = line.steps()
+            start = (line.start.y - y_lo) * width + line.start.x - x_lo
+            # a line never covers the same cell twice, so plain += is safe
+            grid[start + np.arange(n) * (dy * width + dx)] += 1
+        return int(np.count_nonzero(grid >= 2))
+
+    grid = array('i', [0]) * (width * height)
+    for line in lines:
+        dx, dy, n = line.steps()
+        start = (line.start.y - y_lo) * width + line.start.x - x_lo
+        stride = dy * width + dx
+        for i in range(n):
+            grid[start + i * stride] += 1
+    return sum(count >= 2 for count in grid)
+
+# For huge, sparse coordinate spaces we never look at individual cells.
+# Every line lies on a line a * x + b * y = key for one of four directions,
+# and along that line we can parametrize points by a single coordinate.
+# Collinear lines overlap as 1-d intervals, and lines in different
+# directions cross in at most one point, which we solve for directly.
+
+Interval = Tuple[int, int]  # inclusive
+
+# (a, b) for the family of lines a * x + b * y = key
+HORIZONTAL, VERTICAL, UP, DOWN = (0, 1), (1, 0), (1, -1), (1, 1)
+FAMILIES = [HORIZONTAL, VERTICAL, UP, DOWN]
+
+def family(line: Line) -> Tuple[int, int]:
+    if line.is_horizontal():
+        return HORIZONTAL
+    elif line.is_vertical():
+        return VERTICAL
+    elif (line.end.x - line.start.x) * (line.end.y - line.start.y) > 0:
+        return UP
+    else:
+        return DOWN
+
+def key(fam: Tuple[int, int], point: Point) -> int:
+    a, b = fam
+    return a * point.x + b * point.y
+
+def param(fam: Tuple[int, int], point: Point) -> int:
+    # y for vertical lines, x for everything else
+    return point.y if fam == VERTICAL else point.x
+
+def from_param(fam: Tuple[int, int], k: int, p: int) -> Point:
+    a, b = fam
+    if fam == VERTICAL:
+        return Point(k, p)
+    return Point(p, (k - a * p) // b)
+
+def crossing(fam1: Tuple[int, int], k1: int, fam2: Tuple[int, int], k2: int) -> Optional[Point]:
+    """
+    The lattice point where two lines from different families cross, if any
+    """
+    (a1, b1), (a2, b2) = fam1, fam2
+    det = a1 * b2 - a2 * b1
+    x, xrem = divmod(k1 * b2 - k2 * b1, det)
+    y, yrem = divmod(a1 * k2 - a2 * k1, det)
+    return Point(x, y) if xrem == yrem == 0 else None
+
+def sweep(intervals: List[Interval]) -> Tuple[List[Interval], List[Interval]]:
+    """
+    Returns the (sorted, disjoint) intervals covered at least once
+    and the intervals covered at least twice.
+    """
+    deltas: Dict[int, int] = Counter()
+    for lo, hi in intervals:
+        deltas[lo] += 1
+        deltas[hi + 1] -= 1
+
+    covered, doubled = [], []
+    depth = 0
+    for p in sorted(deltas):
+        was, depth = depth, depth + deltas[p]
+        if was < 1 <= depth:
+            covered_start = p
+        elif depth < 1 <= was:
+            covered.append((covered_start, p - 1))
+        if was < 2 <= depth:
+            doubled_start = p
+        elif depth < 2 <= was:
+            doubled.append((doubled_start, p - 1))
+    return covered, doubled
+
+def contains(intervals: List[Interval], p: int) -> bool:
+    i = bisect_right(intervals, (p, float('inf'))) - 1
+    return i >= 0 and intervals[i][0] <= p <= intervals[i][1]
+
+def sweep_crossings(fam1: Tuple[int, int], segments1: Dict[int, List[Interval]],
+                    fam2: Tuple[int, int], segments2: Dict[int, List[Interval]]) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (k1, k2) for every fam1 segment (on line k1) that crosses a fam2
+    segment (on line k2). In coordinates (u, v) = (fam2 key, fam1 key) the
+    fam1 segments are horizontal and the fam2 segments are vertical, so we
+    sweep along u, keep the v of the active fam1 segments in a sorted list,
+    and each fam2 segment is a range query on that list.
+    """
+    # at the same u, insert (0) before querying (1) before removing (2)
+    events = []
+    for k1, intervals in segments1.items():
+        for lo, hi in intervals:
+            u_lo, u_hi = sorted(key(fam2, from_param(fam1, k1, p)) for p in (lo, hi))
+            events.append((u_lo, 0, k1, k1))
+            events.append((u_hi, 2, k1, k1))
+    for k2, intervals in segments2.items():
+        for lo, hi in intervals:
+            v_lo, v_hi = sorted(key(fam1, from_param(fam2, k2, p)) for p in (lo, hi))
+            events.append((k2, 1, v_lo, v_hi))
+    events.sort()
+
+    active: List[int] = []
+    for u, kind, v_lo, v_hi in events:
+        if kind == 0:
+            insort(active, v_lo)
+        elif kind == 2:
+            del active[bisect_left(active, v_lo)]
+        else:
+            for v in active[bisect_left(active, v_lo):bisect_right(active, v_hi)]:
+                yield v, u
+
+def count_vents_sweep(lines: Iterable[Line], hv_only=True) -> int:
+    """
+    Same as count_vents, but time and memory scale with the number of lines
+    and crossings rather than the number of covered points.
+    """
+    groups: Dict[Tuple[int, int], Dict[int, List[Interval]]] = {fam: defaultdict(list) for fam in FAMILIES}
+    for line in lines:
+        if hv_only and not (line.is_horizontal() or line.is_vertical()):
+            continue
+        fam = family(line)
+        lo, hi = sorted([param(fam, line.start), param(fam, line.end)])
+        groups[fam][key(fam, line.start)].append((lo, hi))
+
+    covered: Dict[Tuple[int, int], Dict[int, List[Interval]]] = {fam: {} for fam in FAMILIES}
+    doubled: Dict[Tuple[int, int], Dict[int, List[Interval]]] = {fam: {} for fam in FAMILIES}
+    for fam in FAMILIES:
+        for k, intervals in groups[fam].items():
+            covered[fam][k], doubled[fam][k] = sweep(intervals)
+
+    # points where collinear lines overlap
+    count = sum(hi - lo + 1
+                for fam in FAMILIES
+                for intervals in doubled[fam].values()
+                for lo, hi in intervals)
+
+    # points where lines from different families cross
+    crossings = set()
+    for i, fam1 in enumerate(FAMILIES):
+        for fam2 in FAMILIES[i + 1:]:
+            for k1, k2 in sweep_crossings(fam1, covered[fam1], fam2, covered[fam2]):
+                point = crossing(fam1, k1, fam2, k2)
+                if point is not None:
+                    crossings.add(point)
+
+    # each crossing counts once, but some of them were already counted
+    # (possibly more than once) as collinear overlaps
+    return count + sum(
+        1 - sum(contains(doubled[fam].get(key(fam, point), []), param(fam, point))
+                for fam in FAMILIES)
+        for point in crossings
+    )
+
 LINES = [Line.parse(raw) for raw in RAW.splitlines()]
 assert count_vents(LINES) == 5
 assert count_vents(LINES, hv_only=False) == 12
+assert count_vents_grid(LINES) == 5
+assert count_vents_grid(LINES, hv_only=False) == 12
+assert count_vents_sweep(LINES) == 5
+assert count_vents_sweep(LINES, hv_only=False) == 12
+
+# long horizontal lines far above short vertical ones never cross
+FAR_APART = ([Line(Point(0, 10 ** 6 + i), Point(10 ** 6, 10 ** 6 + i)) for i in range(100)] +
+             [Line(Point(100 * i, 0), Point(100 * i, 10)) for i in range(100)])
+assert count_vents_sweep(FAR_APART, hv_only=False) == 0
 
 if __name__ == '__main__':
     raw = open('data/day05.txt').read()
     lines = [Line.parse(raw) for raw in raw.splitlines()]
     print(count_vents(lines))
-    print(count_vents(lines, hv_only=False))
\ No newline at end of file
+    print(count_vents(lines, hv_only=False))
+    print(count_vents_grid(lines))
+    print(count_vents_grid(lines, hv_only=False))
+    print(count_vents_sweep(lines))
+    print(count_vents_sweep(lines, hv_only=False))
\ No newline at end of file
@@ -1,9 +1,36 @@
-from typing import List
+from typing import List, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = "3,4,3,1,2"
 INPUT = [int(x) for x in RAW.split(",")]
+Matrix = List[List[int]]
+
+def mat_mul(a: Matrix, b: Matrix, modulus: Optional[int] = None) -> Matrix:
+    result = [[sum(a_ik * b_kj for a_ik, b_kj in zip(row, col)) for col in zip(*b)] for row in a]
+    if modulus is not None:
+        result = [[x % modulus for x in row] for row in result]
+    return result
+
+def mat_vec(a: Matrix, v: List[int], modulus: Optional[int] = None) -> List[int]:
+    result = [sum(a_ij * v_j for a_ij, v_j in zip(row, v)) for row in a]
+    if modulus is not None:
+        result = [x % modulus for x in result]
+    return result
+
+# new_timers = TRANSITION @ timers
+TRANSITION = [[1 if j == i + 1 else 0 for j in range(9)] for i in range(9)]
+TRANSITION[6][0] = 1
+TRANSITION[8][0] = 1
+
 
 class LanternFish:
+    # modulus -> [TRANSITION ** 1, TRANSITION ** 2, TRANSITION ** 4, ...]
+    _powers: Dict[Optional[int], List[Matrix]] = {}
+
     def __init__(self, timers: List[int]) -> None:
         self.timers = [0 for i in range(9)]
         for timer in timers:
@@ -15,6 +42,31 @@ class LanternFish:
         new_timers[6] += self.timers[0]
         self.timers = new_timers
 
+    def fast_forward(self, num_days: int, modulus: Optional[int] = None) -> None:
+        """
+        Same as calling step() num_days times, but by multiplying by the
+        powers of two of the transition matrix, which are cached across calls.
+        If a modulus is given, the timers are reduced modulo it.
+        """
+        if num_days < 0:
+            raise ValueError(f"Cannot fast forward {num_days} days")
+
+        timers = self.timers if modulus is None else [t % modulus for t in self.timers]
+
+        for bit in range(num_days.bit_length()):
+            if (num_days >> bit) & 1:
+                timers = mat_vec(LanternFish.transition_power(bit, modulus), timers, modulus)
+
+        self.timers = timers
+
+    @staticmethod
+    def transition_power(bit: int, modulus: Optional[int] = None) -> Matrix:
+        """Returns TRANSITION ** (2 ** bit), from the cache if possible"""
+        powers = LanternFish._powers.setdefault(modulus, [TRANSITION])
+        while len(powers) <= bit:
+            powers.append(mat_mul(powers[-1], powers[-1], modulus))
+        return powers[bit]
+
     def count(self) -> int:
         return sum(self.timers)
 
@@ -30,6 +82,109 @@ for n in range(256 - 80):
     LF.step()
 assert LF.count() == 26984457539
 
+for n in [0, 1, 18, 80, 256]:
+    LF = LanternFish(INPUT)
+    for _ in range(n):
+        LF.step()
+    LF2 = LanternFish(INPUT)
+    LF2.fast_forward(n)
+    assert LF2.timers == LF.timers
+    LF3 = LanternFish(INPUT)
+    LF3.fast_forward(n, modulus=1_000_000_007)
+    assert LF3.timers == [t % 1_000_000_007 for t in LF.timers]
+
+try:
+    LanternFish(INPUT).fast_forward(-1)
+    assert False, "expected a ValueError"
+except ValueError:
+    pass
+
+# int64 is plenty for a while, but populations roughly double every
+# week, so once any total gets near the limit we switch to python ints
+SAFE_TOTAL = 2 ** 62
+
+class LanternFishBatch:
+    """
+    Many independent populations simulated together,
+    as an (N, 9) array of timer counts.
+    """
+    def __init__(self, populations: List[List[int]]) -> None:
+        timers = [LanternFish(timers).timers for timers in populations]
+        self.timers = timers if np is None else np.array(timers, dtype=np.int64).reshape(-1, 9)
+
+    def _ensure_capacity(self) -> None:
+        """Switch to object dtype if a step could overflow int64"""
+        if self.timers.dtype == np.int64 and len(self.timers) and self.timers.sum(axis=1).max() >= SAFE_TOTAL:
+            self.timers = self.timers.astype(object)
+
+    def step(self) -> None:
+        if np is None:
+            self.timers = [timers[1:7] + [timers[7] + timers[0], timers[8], timers[0]]
+                           for timers in self.timers]
+            return
+
+        self._ensure_capacity()
+        zeros = self.timers[:, 0].copy()
+        self.timers = np.roll(self.timers, -1, axis=1)
+        self.timers[:, 6] += zeros
+
+    def fast_forward(self, num_days: int, modulus: Optional[int] = None) -> None:
+        """
+        Same as calling step() num_days times, multiplying by the
+        cached matrix powers from LanternFish, in exact arithmetic.
+        """
+        if num_days < 0:
+            raise ValueError(f"Cannot fast forward {num_days} days")
+
+        if np is None:
+            timers = [[t % modulus for t in row] if modulus is not None else row for row in self.timers]
+        else:
+            timers = self.timers.astype(object)
+            if modulus is not None:
+                timers %= modulus
+
+        for bit in range(num_days.bit_length()):
+            if (num_days >> bit) & 1:
+                power = LanternFish.transition_power(bit, modulus)
+                if np is None:
+                    timers = [mat_vec(power, row, modulus) for row in timers]
+                else:
+                    timers = timers @ np.array(power, dtype=object).T
+                    if modulus is not None:
+                        timers %= modulus
+
+        if np is not None and len(timers) and timers.sum(axis=1).max() < SAFE_TOTAL:
+            timers = timers.astype(np.int64)
+        self.timers = timers
+
+    def counts(self) -> List[int]:
+        if np is None:
+            return [sum(timers) for timers in self.timers]
+        return [int(count) for count in self.timers.sum(axis=1)]
+
+
+BATCH = LanternFishBatch([INPUT, [0], [8, 8, 1]])
+for _ in range(80):
+    BATCH.step()
+assert BATCH.counts()[0] == 5934
+BATCH2 = LanternFishBatch([INPUT, [0], [8, 8, 1]])
+BATCH2.fast_forward(80)
+assert BATCH2.counts() == BATCH.counts()
+for _ in range(500 - 80):
+    BATCH.step()
+BATCH2.fast_forward(500 - 80)
+assert BATCH2.counts() == BATCH.counts()
+LF = LanternFish([8, 8, 1])
+LF.fast_forward(500)
+assert BATCH.counts()[2] == LF.count() > 2 ** 64
+
+try:
+    LanternFishBatch([INPUT]).fast_forward(-1)
+    assert False, "expected a ValueError"
+except ValueError:
+    pass
+
+
 if __name__ == "__main__":
     raw = open("data/day06.txt").read()
     input = [int(x) for x in raw.split(",")]
@@ -39,4 +194,12 @@ if __name__ == "__main__":
     print(lf.count())
     for _ in range(256 - 80):
         lf.step()
-    print(lf.count())
\ No newline at end of file
+    print(lf.count())
+
+    lf = LanternFish(input)
+    lf.fast_forward(256)
+    print(lf.count())
+
+    batch = LanternFishBatch([input])
+    batch.fast_forward(256)
+    print(batch.counts()[0])
\ No newline at end of file
@@ -1,4 +1,12 @@
-from typing import List
+from typing import List, Tuple, Dict, Sequence
+from bisect import bisect_left
+from math import comb
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = "16,1,2,0,4,2,7,1,2,14"
 POSITIONS = [int(x) for x in RAW.split(",")]
@@ -55,6 +63,155 @@ TC = cost_to_target(POSITIONS, LCP)
 assert TC == 168
 
 
+class Fleet:
+    """
+    Sorts the crab positions once and keeps prefix sums, so that the
+    total cost to any target takes O(log n) instead of O(n).
+    """
+    def __init__(self, positions: List[int]) -> None:
+        self.positions = sorted(positions)
+        self.n = len(positions)
+
+        # prefix_sums[i] = sum(self.positions[:i])
+        self.prefix_sums = [0]
+        for x in self.positions:
+            self.prefix_sums.append(self.prefix_sums[-1] + x)
+        self.sum_of_squares = sum(x * x for x in self.positions)
+
+        # k -> prefix sums of x ** k, built on demand
+        self.power_prefix_sums: Dict[int, List[int]] = {}
+        self.power_prefix_sums_arrays: Dict[Tuple[int, type], 'np.ndarray'] = {}
+
+    def total_distance_to(self, target: int) -> int:
+        i = bisect_left(self.positions, target)
+        below = target * i - self.prefix_sums[i]
+        above = (self.prefix_sums[-1] - self.prefix_sums[i]) - target * (self.n - i)
+        return below + above
+
+    def cost_to_target(self, target: int) -> int:
+        """
+        cost(d) = (d^2 + d) / 2, and the sum of the d^2
+        only depends on the sum and sum of squares of the positions
+        """
+        squared = self.sum_of_squares - 2 * target * self.prefix_sums[-1] + self.n * target * target
+        return (squared + self.total_distance_to(target)) // 2
+
+    def best_position(self) -> Tuple[int, int]:
+        """
+        The total distance is minimized at the median
+        (the lower median, to match the brute force tie-breaking)
+        """
+        target = self.positions[(self.n - 1) // 2]
+        return target, self.total_distance_to(target)
+
+    def lowest_cost_position(self) -> Tuple[int, int]:
+        """
+        The derivative of the (continuous) cost is
+        n * t - sum(x) + (#below - #above) / 2,
+        so the minimum is within 1/2 of the mean,
+        and the cost is convex, so we only need to check
+        the integers on either side of that window.
+        """
+        total = self.prefix_sums[-1]
+        lo = max((2 * total - self.n) // (2 * self.n), self.positions[0])
+        hi = min(-((-2 * total - self.n) // (2 * self.n)), self.positions[-1])
+        return min(((t, self.cost_to_target(t)) for t in range(lo, hi + 1)),
+                   key=lambda tc: (tc[1], tc[0]))
+
+    def _power_prefix_sums(self, k: int) -> List[int]:
+        if k not in self.power_prefix_sums:
+            sums = [0]
+            for x in self.positions:
+                sums.append(sums[-1] + x ** k)
+            self.power_prefix_sums[k] = sums
+        return self.power_prefix_sums[k]
+
+    def _power_prefix_sums_array(self, k: int, dtype) -> 'np.ndarray':
+        if (k, dtype) not in self.power_prefix_sums_arrays:
+            sums = self._power_prefix_sums(k)
+            if dtype is np.int64:
+                # wrap into int64 the same way int64 arithmetic would
+                sums = [(s + 2 ** 63) % 2 ** 64 - 2 ** 63 for s in sums]
+            self.power_prefix_sums_arrays[k, dtype] = np.array(sums, dtype=dtype)
+        return self.power_prefix_sums_arrays[k, dtype]
+
+    def polynomial_cost_to(self, target: int, coefficients: Sequence[int]) -> int:
+        """
+        Total cost to the target when moving distance d costs
+        sum(c * d ** k for k, c in enumerate(coefficients)).
+        Expanding (t - x) ** k and (x - t) ** k binomially, each power
+        only needs prefix sums of x ** j on either side of the target.
+        """
+        i = bisect_left(self.positions, target)
+        total = 0
+        for k, c in enumerate(coefficients):
+            if not c:
+                continue
+            for j in range(k + 1):
+                sums = self._power_prefix_sums(j)
+                below = sums[i]
+                above = sums[-1] - sums[i]
+                term = comb(k, j) * target ** (k - j)
+                total += c * term * ((-1) ** j * below + (-1) ** (k - j) * above)
+        return total
+
+    def polynomial_costs_to(self, targets: Sequence[int], coefficients: Sequence[int]) -> List[int]:
+        """
+        polynomial_cost_to for a whole batch of targets at once, using numpy
+        (with python ints if the totals could overflow int64)
+        """
+        if np is None or not self.n:
+            return [self.polynomial_cost_to(t, coefficients) for t in targets]
+
+        targets = np.asarray(targets, dtype=np.int64)
+        # int64 arithmetic wraps around exactly modulo 2 ** 64, so the
+        # intermediate terms may overflow as long as the totals fit
+        max_distance = 2 * max(abs(int(self.positions[0])), abs(int(self.positions[-1])),
+                               int(np.abs(targets).max(initial=0)))
+        bound = self.n * sum(abs(c) * max_distance ** k for k, c in enumerate(coefficients))
+        dtype = np.int64 if bound < 2 ** 63 else object
+
+        i = np.searchsorted(np.array(self.positions, dtype=np.int64), targets, side='left')
+        t = targets.astype(dtype)
+        total = np.zeros(len(targets), dtype=dtype)
+        for k, c in enumerate(coefficients):
+            if not c:
+                continue
+            for j in range(k + 1):
+                sums = self._power_prefix_sums_array(j, dtype)
+                below = sums[i]
+                above = sums[-1] - below
+                term = comb(k, j) * t ** (k - j)
+                total += c * term * ((-1) ** j * below + (-1) ** (k - j) * above)
+        return [int(x) for x in total]
+
+    def total_distances_to(self, targets: Sequence[int]) -> List[int]:
+        return self.polynomial_costs_to(targets, [0, 1])
+
+    def costs_to_targets(self, targets: Sequence[int]) -> List[int]:
+        return [c // 2 for c in self.polynomial_costs_to(targets, [0, 1, 1])]
+
+
+FLEET = Fleet(POSITIONS)
+assert FLEET.best_position() == (2, 37)
+assert FLEET.lowest_cost_position() == (5, 168)
+TARGETS = list(range(-3, 20))
+assert FLEET.total_distances_to(TARGETS) == [total_distance_to(POSITIONS, t) for t in TARGETS]
+assert FLEET.costs_to_targets(TARGETS) == [cost_to_target(POSITIONS, t) for t in TARGETS]
+assert FLEET.polynomial_costs_to(TARGETS, [1, 0, 0, 2]) == [
+    sum(1 + 2 * abs(x - t) ** 3 for x in POSITIONS) for t in TARGETS
+]
+
+RNG = random.Random(7)
+for _ in range(200):
+    positions = [RNG.randint(0, 50) for _ in range(RNG.randint(1, 12))]
+    fleet = Fleet(positions)
+    bp = best_position(positions)
+    assert fleet.best_position() == (bp, total_distance_to(positions, bp))
+    lcp = lowest_cost_position(positions)
+    assert fleet.lowest_cost_position() == (lcp, cost_to_target(positions, lcp))
+
+
 if __name__ == "__main__":
     raw = open("data/day07.txt").read()
     positions = [int(x) for x in raw.split(",")]
@@ -66,4 +223,8 @@ if __name__ == "__main__":
     lcp = lowest_cost_position(positions)
     tc = cost_to_target(positions, lcp)
     print(f"Lowest cost position: {lcp}")
-    print(f"Total cost: {tc}")
\ No newline at end of file
+    print(f"Total cost: {tc}")
+
+    fleet = Fleet(positions)
+    print(fleet.best_position())
+    print(fleet.lowest_cost_position())
\ No newline at end of file
@@ -1,5 +1,10 @@
 from dataclasses import dataclass
-from collections import Counter
+from collections import Counter, deque
+from typing import List, Iterator, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+import time
 
 RAW = """be cfbegad cbdgef fgaecd cgeb fdcge agebfd fecdb fabcd edb | fdgacbe cefdb cefbgd gcbe
 edbfga begcd cbg gc gcadebf fbgde acbgfd abcde gfcbed gfec | fcgedb cgb dgebacf gc
@@ -129,8 +134,142 @@ def decode(raw: str) -> int:
 assert sum(decode(display) for display in DISPLAYS) == 61229
 
 
+# A faster decoder: each pattern becomes a 7-bit mask, and each wire is
+# scored by how many of the ten patterns use it (a: 8, b: 6, c: 8, ...).
+# Summing the scores of a pattern's wires gives a number that doesn't
+# depend on the wiring and is different for every digit.
+
+DIGIT_WIRES = ["abcefg", "cf", "acdeg", "acdfg", "bcdf",
+               "abdfg", "abdefg", "acf", "abcdefg", "abcdfg"]
+
+def wires_to_mask(wires: str) -> int:
+    mask = 0
+    for ch in wires:
+        mask |= 1 << (ord(ch) - ord('a'))
+    return mask
+
+def wire_scores(masks: List[int]) -> List[int]:
+    return [sum((mask >> wire) & 1 for mask in masks) for wire in range(7)]
+
+def signature(mask: int, scores: List[int]) -> int:
+    return sum(score for wire, score in enumerate(scores) if (mask >> wire) & 1)
+
+DIGIT_MASKS = [wires_to_mask(wires) for wires in DIGIT_WIRES]
+DIGIT_SCORES = wire_scores(DIGIT_MASKS)
+SIGNATURE_TO_DIGIT = [-1] * (7 * 10 + 1)
+for digit, mask in enumerate(DIGIT_MASKS):
+    SIGNATURE_TO_DIGIT[signature(mask, DIGIT_SCORES)] = digit
+assert sorted(SIGNATURE_TO_DIGIT)[-10:] == list(range(10))
+
+def decode_masks(raw: str) -> int:
+    patterns, outputs = raw.split(" | ")
+    masks = [wires_to_mask(wires) for wires in patterns.split()]
+    scores = wire_scores(masks)
+
+    mask_to_digit = [-1] * 128
+    for mask in masks:
+        mask_to_digit[mask] = SIGNATURE_TO_DIGIT[signature(mask, scores)]
+
+    value = 0
+    for wires in outputs.split():
+        value = 10 * value + mask_to_digit[wires_to_mask(wires)]
+    return value
+
+assert all(decode_masks(display) == decode(display) for display in DISPLAYS)
+
+
+# For display logs too big to read in one go, we read the file in large
+# chunks (each ending on a newline) and decode them in a process pool.
+
+Totals = Tuple[int, int, int]  # (lines, count_1478, sum of decoded values)
+
+def chunk_offsets(path: str, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (start, end) byte ranges of about chunk_size bytes,
+    each one extended to the end of its last line.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+def process_chunk(path: str, start: int, end: int) -> Totals:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        displays = [line for line in f.read(end - start).decode().splitlines() if line.strip()]
+    return (len(displays),
+            sum(count_1478(display) for display in displays),
+            sum(decode_masks(display) for display in displays))
+
+def stream_totals(path: str,
+                  num_workers: Optional[int] = None,
+                  chunk_size: int = 64 * 1024 * 1024) -> Iterator[Totals]:
+    """
+    Yields the running totals after each chunk, in file order,
+    keeping at most 2 * num_workers chunks in flight.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    lines = ones = total = 0
+    with ProcessPoolExecutor(num_workers) as executor:
+        in_flight = deque()
+        for start, end in chunk_offsets(path, chunk_size):
+            in_flight.append(executor.submit(process_chunk, path, start, end))
+            if len(in_flight) >= 2 * num_workers:
+                n, o, t = in_flight.popleft().result()
+                lines, ones, total = lines + n, ones + o, total + t
+                yield lines, ones, total
+        while in_flight:
+            n, o, t = in_flight.popleft().result()
+            lines, ones, total = lines + n, ones + o, total + t
+            yield lines, ones, total
+
+def process_file(path: str,
+                 num_workers: Optional[int] = None,
+                 chunk_size: int = 64 * 1024 * 1024) -> Tuple[Totals, float]:
+    """
+    Returns the final totals and the elapsed seconds
+    """
+    start = time.perf_counter()
+    totals = (0, 0, 0)
+    for totals in stream_totals(path, num_workers, chunk_size):
+        pass
+    return totals, time.perf_counter() - start
+
+# The pool itself is checked in __main__ below: a pool started while this
+# module is still being imported deadlocks pickling process_chunk.
+RAW_TOTALS = (len(DISPLAYS),
+              sum(count_1478(display) for display in DISPLAYS),
+              sum(decode(display) for display in DISPLAYS))
+with tempfile.TemporaryDirectory() as TMP:
+    PATH = os.path.join(TMP, "day08.txt")
+    with open(PATH, "w") as f:
+        f.write(RAW)
+    for chunk_size in [1, 50, 100, len(RAW)]:
+        CHUNKS = list(chunk_offsets(PATH, chunk_size))
+        assert CHUNKS[0][0] == 0 and CHUNKS[-1][1] == len(RAW)
+        CHUNK_TOTALS = [process_chunk(PATH, start, end) for start, end in CHUNKS]
+        assert tuple(map(sum, zip(*CHUNK_TOTALS))) == RAW_TOTALS
+
+
 if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "day08.txt")
+        with open(path, "w") as f:
+            f.write(RAW)
+        assert list(stream_totals(path, 2, chunk_size=50))[-1] == RAW_TOTALS
+
     raw = open('data/day08.txt').read()
     displays = raw.splitlines()
     print(sum(count_1478(display) for display in displays))
-    print(sum(decode(display) for display in displays))
\ No newline at end of file
+    print(sum(decode(display) for display in displays))
+    print(sum(decode_masks(display) for display in displays))
+
+    (lines, ones, total), elapsed = process_file('data/day08.txt', chunk_size=4096)
+    print(f"{lines} lines in {elapsed:.2f}s ({lines / elapsed:,.0f} lines/sec)")
+    print(ones)
+    print(total)
\ No newline at end of file
@@ -1,5 +1,12 @@
-from typing import Iterable, Iterator, Tuple, List
+from typing import Iterable, Iterator, Tuple, List, Optional, Dict, Union
 from copy import deepcopy
+from heapq import nlargest
+from math import prod
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 RAW = """2199943210
 3987894921
@@ -14,6 +21,9 @@ class HeightMap:
         self.nr = len(self.map)
         self.nc = len(self.map[0])
 
+        self._low_point_mask: Optional[List[bool]] = None
+        self._basin_roots: Optional[List[int]] = None
+
     def neighbors(self, r: int, c: int) -> Iterator[Tuple[int, int]]:
         for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
             if 0 <= r + dr < self.nr and 0 <= c + dc < self.nc:
@@ -32,12 +42,23 @@ class HeightMap:
         """
         return self.map[r][c] + 1
 
+    def low_point_mask(self) -> List[bool]:
+        """
+        is_low_point for every cell (flattened row by row),
+        computed once and shared by everything that needs low points
+        """
+        if self._low_point_mask is None:
+            self._low_point_mask = [
+                self.is_low_point(r, c)
+                for r in range(self.nr)
+                for c in range(self.nc)
+            ]
+        return self._low_point_mask
+
     def total_risk_level_of_low_points(self) -> int:
         return sum(
             self.risk_level(r, c)
-            for r in range(self.nr)
-            for c in range(self.nc)
-            if self.is_low_point(r, c)
+            for r, c in self.all_low_points()
         )
 
     def find_basin_size(self, r: int, c: int) -> int:
@@ -59,7 +80,8 @@ class HeightMap:
 
     def all_low_points(self) -> List[Tuple[int, int]]:
         """returns all low points"""
-        return [(r, c) for r in range(self.nr) for c in range(self.nc) if self.is_low_point(r, c)]
+        mask = self.low_point_mask()
+        return [(r, c) for r in range(self.nr) for c in range(self.nc) if mask[r * self.nc + c]]
 
     def all_basin_sizes(self) -> List[int]:
         """returns all basin sizes"""
@@ -70,13 +92,232 @@ class HeightMap:
         all_basin_sizes = sorted(self.all_basin_sizes(), reverse=True)
         return all_basin_sizes[0] * all_basin_sizes[1] * all_basin_sizes[2]
 
+    def basin_roots(self) -> List[int]:
+        """
+        Labels every cell (flattened row by row) in a single pass, using
+        union-find to join each non-9 cell with its non-9 neighbors above
+        and to the left. Returns the root of each cell's basin, or -1 for 9s.
+        """
+        if self._basin_roots is not None:
+            return self._basin_roots
+
+        nc = self.nc
+        parent = [-1] * (self.nr * nc)
+
+        def find(i: int) -> int:
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+            return root
+
+        for r, row in enumerate(self.map):
+            for c, height in enumerate(row):
+                if height == 9:
+                    continue
+                i = r * nc + c
+                parent[i] = i
+                if c > 0 and parent[i - 1] != -1:
+                    parent[find(i)] = find(i - 1)
+                if r > 0 and parent[i - nc] != -1:
+                    root, other = find(i), find(i - nc)
+                    if root != other:
+                        parent[root] = other
+
+        self._basin_roots = [find(i) if p != -1 else -1 for i, p in enumerate(parent)]
+        return self._basin_roots
+
+    def basin_labels(self) -> List[List[int]]:
+        """the basin root of every cell, as a grid (-1 for 9s)"""
+        roots = self.basin_roots()
+        return [roots[r * self.nc:(r + 1) * self.nc] for r in range(self.nr)]
+
+    def labeled_basin_sizes(self) -> List[int]:
+        """
+        Same as all_basin_sizes (the size of the basin of each low point),
+        but from the labels rather than a flood fill per low point
+        """
+        roots = self.basin_roots()
+        sizes = [0] * len(roots)
+        for root in roots:
+            if root != -1:
+                sizes[root] += 1
+
+        mask = self.low_point_mask()
+        return [sizes[roots[i]] for i, is_low in enumerate(mask) if is_low]
+
+    def top_k_basins_product(self, k: int = 3) -> int:
+        return prod(nlargest(k, self.labeled_basin_sizes()))
+
 HM = HeightMap(RAW)
 assert HM.total_risk_level_of_low_points() == 15
 assert sorted(HM.all_basin_sizes()) == [3, 9, 9, 14]
 assert HM.three_largest_basins_product() == 9 * 9 * 14
+assert HM.labeled_basin_sizes() == HM.all_basin_sizes()
+assert HM.top_k_basins_product() == 9 * 9 * 14
+assert HM.basin_labels()[0][:3] == [0, 0, -1]
+
+class TiledHeightMap:
+    """
+    A height map that is never loaded into memory as a whole. The raw
+    digits file is memory-mapped (one byte per cell) and processed in bands
+    of rows, each with a halo row above and below for the low point checks.
+    Basins are labeled as runs of non-9 cells in each row, and a union-find
+    over the runs of adjacent rows merges labels across rows (and so across
+    bands). A basin is finished as soon as a row doesn't touch it, so only
+    the labels for the current row are ever kept.
+    """
+    def __init__(self, source: Union[str, bytes], band_rows: int = 1024) -> None:
+        if np is None:
+            raise ImportError("TiledHeightMap requires numpy")
+
+        if isinstance(source, str):
+            self.buffer = np.memmap(source, dtype=np.uint8, mode='r')
+        else:
+            self.buffer = np.frombuffer(source, dtype=np.uint8)
+
+        self.nc = self._first_newline()
+        self.width = self.nc + 1
+        self.nr = (len(self.buffer) + 1) // self.width
+        self.band_rows = band_rows
+
+        # every row must be exactly nc digits plus a newline (except maybe the last)
+        if len(self.buffer) not in (self.nr * self.width, self.nr * self.width - 1):
+            raise ValueError("rows are not all the same length (or there are blank lines)")
+        if self.nc and self.buffer[self.nc - 1] == ord('\r'):
+            raise ValueError("CRLF line endings are not supported")
+
+    def _first_newline(self, chunk_size: int = 1 << 20) -> int:
+        """the index of the first newline (or the length, if there isn't one)"""
+        for start in range(0, len(self.buffer), chunk_size):
+            newlines = np.flatnonzero(self.buffer[start:start + chunk_size] == ord('\n'))
+            if len(newlines):
+                return start + int(newlines[0])
+        return len(self.buffer)
+
+    def rows(self, r0: int, r1: int) -> 'np.ndarray':
+        """heights of rows r0 to r1 (exclusive) as an uint8 array"""
+        r0, r1 = max(r0, 0), min(r1, self.nr)
+        raw = self.buffer[r0 * self.width:r1 * self.width]
+        if len(raw) < (r1 - r0) * self.width:
+            # the last line has no newline
+            raw = np.append(raw, np.uint8(ord('\n')))
+        raw = raw.reshape(r1 - r0, self.width)
+        if (raw[:, -1] != ord('\n')).any():
+            raise ValueError(f"rows {r0} to {r1} are not all {self.nc} wide")
+        return raw[:, :self.nc] - np.uint8(ord('0'))
+
+    def bands(self) -> Iterator[Tuple['np.ndarray', 'np.ndarray']]:
+        """yields (heights, low point mask) for each band of rows"""
+        for r0 in range(0, self.nr, self.band_rows):
+            r1 = min(r0 + self.band_rows, self.nr)
+            padded = np.full((r1 - r0 + 2, self.nc + 2), 10, dtype=np.uint8)
+            padded[1 if r0 == 0 else 0:padded.shape[0] - (1 if r1 == self.nr else 0), 1:-1] = self.rows(r0 - 1, r1 + 1)
+
+            heights = padded[1:-1, 1:-1]
+            low = ((heights < padded[:-2, 1:-1]) & (heights < padded[2:, 1:-1]) &
+                   (heights < padded[1:-1, :-2]) & (heights < padded[1:-1, 2:]))
+            yield heights, low
+
+    def total_risk_level_of_low_points(self) -> int:
+        return sum(int((heights[low].astype(np.int64) + 1).sum()) for heights, low in self.bands())
+
+    def iter_basin_sizes(self) -> Iterator[int]:
+        """
+        Yields the size of the basin of each low point
+        (in the order the basins are finished, not the order of the low points)
+        """
+        # runs of the previous row: (start, end, component), plus [size, lows] per component
+        prev_runs: List[Tuple[int, int, int]] = []
+        components: List[List[int]] = []
+
+        for heights, low in self.bands():
+            for row, row_low in zip(heights, low):
+                # runs of non-9 cells as [start, end)
+                edges = np.flatnonzero(np.diff(np.concatenate(([0], row != 9, [0])).astype(np.int8)))
+                starts, ends = edges[0::2], edges[1::2]
+                run_lows = np.bincount(np.searchsorted(starts, np.flatnonzero(row_low & (row != 9)), side='right') - 1,
+                                       minlength=len(starts))
+                # a 9 is only a low point if it has no neighbors at all
+                yield from [1] * int((row_low & (row == 9)).sum())
+
+                # union-find, nodes 0 .. k - 1 are the previous components
+                # and k .. k + len(starts) - 1 are this row's runs
+                k = len(components)
+                parent = list(range(k + len(starts)))
+
+                def find(i: int) -> int:
+                    while parent[i] != i:
+                        parent[i] = parent[parent[i]]
+                        i = parent[i]
+                    return i
+
+                touched = [False] * k
+                i = j = 0
+                while i < len(prev_runs) and j < len(starts):
+                    p_start, p_end, comp = prev_runs[i]
+                    if p_start < ends[j] and starts[j] < p_end:
+                        touched[comp] = True
+                        parent[find(comp)] = find(k + j)
+                    if p_end <= ends[j]:
+                        i += 1
+                    else:
+                        j += 1
+
+                # previous components that don't continue into this row are finished
+                for comp, size_lows in enumerate(components):
+                    if not touched[comp]:
+                        yield from [size_lows[0]] * size_lows[1]
+
+                new_ids: Dict[int, int] = {}
+                new_components: List[List[int]] = []
+                new_runs = []
+                for j, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                    root = find(k + j)
+                    if root not in new_ids:
+                        new_ids[root] = len(new_components)
+                        new_components.append([0, 0])
+                    comp = new_ids[root]
+                    new_components[comp][0] += end - start
+                    new_components[comp][1] += int(run_lows[j])
+                    new_runs.append((start, end, comp))
+                for comp, size_lows in enumerate(components):
+                    if touched[comp]:
+                        totals = new_components[new_ids[find(comp)]]
+                        totals[0] += size_lows[0]
+                        totals[1] += size_lows[1]
+
+                prev_runs, components = new_runs, new_components
+
+        for size, lows in components:
+            yield from [size] * lows
+
+    def three_largest_basins_product(self) -> int:
+        return prod(nlargest(3, self.iter_basin_sizes()))
+
+for band_rows in (1, 2, 1024) if np is not None else ():
+    THM = TiledHeightMap(RAW.encode(), band_rows)
+    assert THM.total_risk_level_of_low_points() == 15
+    assert sorted(THM.iter_basin_sizes()) == [3, 9, 9, 14]
+    assert THM.three_largest_basins_product() == 9 * 9 * 14
+
+for BAD in ("123\n456\n\n", "123\r\n456", "1234\n56\n789", "12\n345\n6") if np is not None else ():
+    try:
+        TiledHeightMap(BAD.encode()).total_risk_level_of_low_points()
+        assert False, "expected a ValueError"
+    except ValueError:
+        pass
+
 
 if __name__ == "__main__":
     raw = open("data/day09.txt").read()
     hm = HeightMap(raw)
     print(hm.total_risk_level_of_low_points())
-    print(hm.three_largest_basins_product())
\ No newline at end of file
+    print(hm.three_largest_basins_product())
+    print(hm.top_k_basins_product())
+
+    if np is not None:
+        thm = TiledHeightMap("data/day09.txt")
+        print(thm.total_risk_level_of_low_points())
+        print(thm.three_largest_basins_product())
\ No newline at end of file
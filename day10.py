@@ -1,4 +1,11 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple, Iterable, Iterator, Dict, Callable
+from dataclasses import dataclass, field
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+import random
+import time
 
 RAW = """[({(<(())[]>[[{[]{<()<>>
 [(()[<>])]({[<{<<[]>>(
@@ -81,10 +88,261 @@ def median_completion_score(lines: List[str]) -> int:
 assert median_completion_score(LINES) == 288957
 
 
+# Closers as the opener they match and their corruption / completion scores
+CLOSES = {OC[o]: o for o in OC}
+OPEN_COMPLETION = {o: COMPLETION_SCORES[c] for o, c in OC.items()}
+
+def scan(line: str) -> Tuple[bool, int]:
+    """
+    Walks the line once, returning (True, syntax error score)
+    if it's corrupted and (False, completion score) if not.
+    """
+    stack = [''] * len(line)
+    depth = 0
+    for c in line:
+        if c in OC:
+            stack[depth] = c
+            depth += 1
+        elif depth == 0 or stack[depth - 1] != CLOSES[c]:
+            return True, SCORE[c]
+        else:
+            depth -= 1
+
+    completion_score = 0
+    for i in range(depth - 1, -1, -1):
+        completion_score = completion_score * 5 + OPEN_COMPLETION[stack[i]]
+    return False, completion_score
+
+def select(values: List[int], k: int) -> int:
+    """
+    Returns the k-th smallest value (0-indexed) in expected linear time
+    using quickselect. Reorders values in place.
+    """
+    lo, hi = 0, len(values) - 1
+    while lo < hi:
+        pivot = values[random.randint(lo, hi)]
+        # three-way partition values[lo:hi+1] into < pivot, == pivot, > pivot
+        lt, i, gt = lo, lo, hi
+        while i <= gt:
+            if values[i] < pivot:
+                values[lt], values[i] = values[i], values[lt]
+                lt += 1
+                i += 1
+            elif values[i] > pivot:
+                values[gt], values[i] = values[i], values[gt]
+                gt -= 1
+            else:
+                i += 1
+        if k < lt:
+            hi = lt - 1
+        elif k > gt:
+            lo = gt + 1
+        else:
+            return pivot
+    return values[k]
+
+def syntax_scores(lines: Iterable[str]) -> Tuple[int, int]:
+    """
+    Returns (total syntax error score, median completion score),
+    scanning each line exactly once
+    """
+    error_score = 0
+    completion_scores = []
+    for line in lines:
+        corrupted, line_score = scan(line)
+        if corrupted:
+            error_score += line_score
+        else:
+            completion_scores.append(line_score)
+
+    # assert that there is an odd number of scores
+    assert len(completion_scores) % 2 == 1
+
+    return error_score, select(completion_scores, len(completion_scores) // 2)
+
+assert [scan(line) for line in LINES if scan(line)[0]] == [(True, score(line)) for line in LINES if score(line)]
+assert scan("<{([{{}}[<[[[<>{}]]]>[]]") == (False, 294)
+assert scan("()") == (False, 0)
+assert syntax_scores(LINES) == (26397, 288957)
+assert all(select(list(VALUES), k) == sorted(VALUES)[k]
+           for VALUES in ([5, 1, 4, 1, 5, 9, 2, 6], [3], [2, 2, 2, 1])
+           for k in range(len(VALUES)))
+
+
+# Validating huge files: batches of lines are scanned in a process pool,
+# and each batch comes back as a Validation, which can be merged with the
+# others. Completion scores are almost all distinct, so instead of keeping
+# them we keep a histogram over a fixed number of buckets. Finding the
+# exact median takes more passes over the file: each one narrows down to
+# the bucket that holds the median, until that bucket is small enough
+# (at most max_kept scores) to keep its scores and select from them.
+# So memory is bounded by the number of buckets and max_kept, at the cost
+# of re-reading the file a few times.
+
+NUM_BUCKETS = 1024
+
+@dataclass(frozen=True)
+class Buckets:
+    """
+    Buckets for completion scores in [lo, hi): fixed-width buckets if
+    width is given, otherwise by bit length (so one per power of two).
+    """
+    lo: int = 0
+    hi: Optional[int] = None
+    width: int = 0
+
+    def index(self, completion_score: int) -> int:
+        if self.width:
+            return (completion_score - self.lo) // self.width
+        return completion_score.bit_length()
+
+    def bounds(self, i: int) -> Tuple[int, int]:
+        if self.width:
+            return self.lo + i * self.width, min(self.lo + (i + 1) * self.width, self.hi)
+        return (0, 1) if i == 0 else (1 << (i - 1), 1 << i)
+
+    def refine(self, i: int) -> 'Buckets':
+        lo, hi = self.bounds(i)
+        return Buckets(lo, hi, max(1, -(-(hi - lo) // NUM_BUCKETS)))
+
+@dataclass
+class Validation:
+    lines: int = 0
+    error_score: int = 0
+    # completion scores below the buckets' range, and the histogram of those in it
+    below: int = 0
+    histogram: Counter = field(default_factory=Counter)
+    # the completion scores in the kept range, if any
+    kept: List[int] = field(default_factory=list)
+    # pid -> (lines, seconds spent scanning)
+    workers: Dict[int, Tuple[int, float]] = field(default_factory=dict)
+
+    def merge(self, other: 'Validation') -> None:
+        self.lines += other.lines
+        self.error_score += other.error_score
+        self.below += other.below
+        self.histogram.update(other.histogram)
+        self.kept.extend(other.kept)
+        for pid, (lines, seconds) in other.workers.items():
+            old_lines, old_seconds = self.workers.get(pid, (0, 0.0))
+            self.workers[pid] = (old_lines + lines, old_seconds + seconds)
+
+    def num_completions(self) -> int:
+        return self.below + sum(self.histogram.values())
+
+def validate_batch(lines: List[str],
+                   buckets: Buckets = Buckets(),
+                   keep: Optional[Tuple[int, int]] = None) -> Validation:
+    start = time.perf_counter()
+    validation = Validation(lines=len(lines))
+    for line in lines:
+        corrupted, line_score = scan(line)
+        if corrupted:
+            validation.error_score += line_score
+        elif line_score < buckets.lo:
+            validation.below += 1
+        elif buckets.hi is None or line_score < buckets.hi:
+            validation.histogram[buckets.index(line_score)] += 1
+            if keep is not None and keep[0] <= line_score < keep[1]:
+                validation.kept.append(line_score)
+    validation.workers[os.getpid()] = (len(lines), time.perf_counter() - start)
+    return validation
+
+def streaming_median(first_pass: Validation,
+                     run_pass: Callable[[Buckets, Optional[Tuple[int, int]]], Validation],
+                     max_kept: int = 1_000_000) -> int:
+    """
+    The exact median completion score, given the (default Buckets) first pass
+    and a way to run another pass with narrower buckets and a range to keep.
+    """
+    num_scores = first_pass.num_completions()
+
+    # assert that there is an odd number of scores
+    assert num_scores % 2 == 1
+    rank = num_scores // 2
+
+    validation, buckets = first_pass, Buckets()
+    while True:
+        seen = validation.below
+        for i in sorted(validation.histogram):
+            if seen + validation.histogram[i] > rank:
+                break
+            seen += validation.histogram[i]
+
+        lo, hi = buckets.bounds(i)
+        if hi - lo == 1:
+            return lo
+        if validation.histogram[i] <= max_kept:
+            validation = run_pass(buckets, (lo, hi))
+            return select(validation.kept, rank - seen)
+
+        buckets = buckets.refine(i)
+        validation = run_pass(buckets, None)
+
+def batches(path: str, batch_size: int) -> Iterator[List[str]]:
+    with open(path) as f:
+        while chunk := list(islice(f, batch_size)):
+            yield [line.rstrip('\n') for line in chunk if line.strip()]
+
+def validate_pass(executor: ProcessPoolExecutor,
+                  path: str,
+                  num_workers: int,
+                  batch_size: int,
+                  buckets: Buckets = Buckets(),
+                  keep: Optional[Tuple[int, int]] = None) -> Validation:
+    """
+    Streams the file in batches to a process pool,
+    keeping at most 2 * num_workers batches in flight.
+    """
+    validation = Validation()
+    in_flight = deque()
+    for batch in batches(path, batch_size):
+        in_flight.append(executor.submit(validate_batch, batch, buckets, keep))
+        if len(in_flight) >= 2 * num_workers:
+            validation.merge(in_flight.popleft().result())
+    while in_flight:
+        validation.merge(in_flight.popleft().result())
+    return validation
+
+def validate_file(path: str,
+                  num_workers: Optional[int] = None,
+                  batch_size: int = 100_000,
+                  max_kept: int = 1_000_000) -> Tuple[Validation, int]:
+    """
+    Returns the Validation from the first pass over the file (with the
+    syntax error score) and the median completion score, which may take
+    a few more passes. The per-worker stats cover every pass, so a worker's
+    line count includes lines it scanned again for the median.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(num_workers) as executor:
+        validation = validate_pass(executor, path, num_workers, batch_size)
+
+        def run_pass(buckets: Buckets, keep: Optional[Tuple[int, int]]) -> Validation:
+            later = validate_pass(executor, path, num_workers, batch_size, buckets, keep)
+            validation.merge(Validation(workers=later.workers))
+            return later
+
+        median = streaming_median(validation, run_pass, max_kept)
+    return validation, median
+
+def _sample_pass(buckets: Buckets = Buckets(), keep: Optional[Tuple[int, int]] = None) -> Validation:
+    validation = validate_batch(LINES[:4], buckets, keep)
+    validation.merge(validate_batch(LINES[4:], buckets, keep))
+    return validation
+
+VALIDATION = _sample_pass()
+assert VALIDATION.lines == len(LINES)
+assert VALIDATION.error_score == 26397
+for MAX_KEPT in (0, 1, 5):
+    assert streaming_median(VALIDATION, _sample_pass, MAX_KEPT) == 288957
+
+
 if __name__ == "__main__":
     raw = open("data/day10.txt").read()
     lines = raw.splitlines()
     print(sum(score(line) for line in lines))
     print(median_completion_score(lines))
 
-    
\ No newline at end of file
+    
+    print(syntax_scores(lines))
\ No newline at end of file
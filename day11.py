@@ -1,6 +1,13 @@
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, List, Optional, Dict
+from collections import deque
+import hashlib
 import itertools
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 RAW = """5483143223
 2745854711
 5264556173
@@ -75,10 +82,196 @@ assert sum(GRID.step() for _ in range(100)) == 1656
 GRID = Grid(RAW.splitlines())
 assert GRID.steps_to_all_flash() == 195
 
+# The border cells are so low that they can never flash
+BORDER = -(1 << 62)
+
+class FlatGrid:
+    """
+    Same as Grid, but the energies live in one flat list with a border
+    of never-flashing cells around them, so the neighbors of every cell
+    are at the same fixed offsets. Flashes are propagated with a worklist:
+    a cell is queued exactly when its energy first goes past 9.
+    """
+    def __init__(self, grid: Iterable[Iterable[str]]):
+        rows = [[int(x) for x in row] for row in grid]
+        self.nr = len(rows)
+        self.nc = len(rows[0])
+        self.width = self.nc + 2
+
+        self.energies = [BORDER] * (self.width * (self.nr + 2))
+        for i, row in enumerate(rows):
+            start = (i + 1) * self.width + 1
+            self.energies[start:start + self.nc] = row
+
+        self.cells = [(i + 1) * self.width + j + 1 for i in range(self.nr) for j in range(self.nc)]
+        w = self.width
+        self.offsets = [-w - 1, -w, -w + 1, -1, 1, w - 1, w, w + 1]
+
+    def rows(self) -> List[List[int]]:
+        return [self.energies[(i + 1) * self.width + 1:(i + 1) * self.width + 1 + self.nc]
+                for i in range(self.nr)]
+
+    def step(self) -> int:
+        """returns the number of flashes"""
+        energies = self.energies
+        offsets = self.offsets
+
+        queue = deque()
+        for cell in self.cells:
+            energies[cell] += 1
+            if energies[cell] == 10:
+                queue.append(cell)
+
+        flashed = []
+        while queue:
+            cell = queue.popleft()
+            flashed.append(cell)
+            for offset in offsets:
+                neighbor = cell + offset
+                energies[neighbor] += 1
+                if energies[neighbor] == 10:
+                    queue.append(neighbor)
+
+        for cell in flashed:
+            energies[cell] = 0
+
+        return len(flashed)
+
+    def steps_to_all_flash(self) -> int:
+        for step in itertools.count(1):
+            if self.step() == self.nr * self.nc:
+                return step
+        raise RuntimeError("cannot get here")
+
+
+GRID = Grid(RAW.splitlines())
+FLAT_GRID = FlatGrid(RAW.splitlines())
+for _ in range(100):
+    assert FLAT_GRID.step() == GRID.step()
+    assert FLAT_GRID.rows() == GRID.grid
+
+FLAT_GRID = FlatGrid(RAW.splitlines())
+assert FLAT_GRID.steps_to_all_flash() == 195
+
+
+class NumpyGrid:
+    """
+    Steps the whole grid at once with numpy: each round of flashing adds
+    the count of newly flashed neighbors (eight shifted copies of the
+    "newly flashed" mask) to every cell. Every state is hashed, so once
+    a state repeats we know the grid is periodic from then on, and can
+    answer questions about any later step without simulating it.
+    """
+    def __init__(self, grid: Iterable[Iterable[str]]):
+        if np is None:
+            raise ImportError("NumpyGrid requires numpy")
+
+        self.energies = np.array([[int(x) for x in row] for row in grid], dtype=np.int64)
+        self.nr, self.nc = self.energies.shape
+
+        # flash_totals[k] is the number of flashes in the first k steps
+        self.flash_totals = [0]
+        self.seen: Dict[bytes, int] = {self._digest(): 0}
+        # (first step of the cycle, length of the cycle)
+        self.cycle: Optional[Tuple[int, int]] = None
+
+    def _digest(self) -> bytes:
+        return hashlib.blake2b(self.energies.astype(np.uint8).tobytes(), digest_size=16).digest()
+
+    def step(self) -> int:
+        """returns the number of flashes"""
+        energies = self.energies
+        energies += 1
+
+        flashed = np.zeros(energies.shape, dtype=bool)
+        padded = np.zeros((self.nr + 2, self.nc + 2), dtype=np.int64)
+        while True:
+            new = (energies > 9) & ~flashed
+            if not new.any():
+                break
+            flashed |= new
+
+            padded[1:-1, 1:-1] = new
+            energies += (padded[:-2, :-2] + padded[:-2, 1:-1] + padded[:-2, 2:] +
+                         padded[1:-1, :-2] + padded[1:-1, 2:] +
+                         padded[2:, :-2] + padded[2:, 1:-1] + padded[2:, 2:])
+
+        energies[flashed] = 0
+        num_flashes = int(flashed.sum())
+
+        steps = len(self.flash_totals)
+        self.flash_totals.append(self.flash_totals[-1] + num_flashes)
+        if self.cycle is None:
+            digest = self._digest()
+            if digest in self.seen:
+                self.cycle = (self.seen[digest], steps - self.seen[digest])
+            else:
+                self.seen[digest] = steps
+
+        return num_flashes
+
+    def flashes_at(self, step: int) -> int:
+        """the number of flashes in the given step (counting from 1)"""
+        return self.flash_totals[step] - self.flash_totals[step - 1]
+
+    def steps_to_all_flash(self) -> Optional[int]:
+        """
+        The first step (since the grid was created) in which every cell
+        flashes, or None if the grid became periodic without that happening
+        """
+        for step in itertools.count(1):
+            while step >= len(self.flash_totals) and self.cycle is None:
+                self.step()
+            if step >= len(self.flash_totals):
+                return None
+            if self.flashes_at(step) == self.nr * self.nc:
+                return step
+
+    def total_flashes(self, num_steps: int) -> int:
+        """
+        The number of flashes in the first num_steps steps (since the grid
+        was created), extrapolated across the cycle once one is found
+        """
+        while num_steps >= len(self.flash_totals) and self.cycle is None:
+            self.step()
+        if num_steps < len(self.flash_totals):
+            return self.flash_totals[num_steps]
+
+        start, length = self.cycle
+        totals = self.flash_totals
+        num_cycles, remainder = divmod(num_steps - start, length)
+        return (totals[start] +
+                num_cycles * (totals[start + length] - totals[start]) +
+                totals[start + remainder] - totals[start])
+
+
+if np is not None:
+    NUMPY_GRID = NumpyGrid(RAW.splitlines())
+    assert NUMPY_GRID.total_flashes(10) == 204
+    assert NUMPY_GRID.total_flashes(100) == 1656
+    assert NUMPY_GRID.steps_to_all_flash() == 195
+
+    # once everything flashes together it keeps doing so every 10 steps
+    assert NUMPY_GRID.total_flashes(10 ** 12) == NUMPY_GRID.total_flashes(10 ** 12 - 10) + 100
+
+    # this one settles into a 9-step cycle in which they never all flash
+    NEVER = NumpyGrid(["6", "6", "3"])
+    assert NEVER.steps_to_all_flash() is None
+    assert NEVER.cycle == (4, 9)
+
+
 if __name__ == "__main__":
     raw = open("data/day11.txt").read()
     grid = Grid(raw.splitlines())
     print(sum(grid.step() for _ in range(100)))
 
     grid = Grid(raw.splitlines())
-    print(grid.steps_to_all_flash())
\ No newline at end of file
+    print(grid.steps_to_all_flash())
+
+    grid = FlatGrid(raw.splitlines())
+    print(grid.steps_to_all_flash())
+
+    if np is not None:
+        grid = NumpyGrid(raw.splitlines())
+        print(grid.total_flashes(100))
+        print(grid.steps_to_all_flash())
\ No newline at end of file
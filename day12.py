@@ -1,6 +1,7 @@
-from typing import List, Tuple
-from collections import defaultdict
+from typing import List, Tuple, Iterator, Optional
+from collections import defaultdict, Counter
 from dataclasses import dataclass
+from functools import lru_cache
 
 RAW1 = """start-A
 start-b
@@ -74,12 +75,88 @@ class Caves:
                         frontier.append(path + [next_cave])
         return list(paths)
 
+    def iter_paths(self, allow_twice: bool = False, limit: Optional[int] = None) -> Iterator[List[str]]:
+        """
+        Yields the paths that find_all_paths (or find_all_paths2,
+        if allow_twice) would find, one at a time, stopping after limit
+        paths if given. The search is a depth-first search over a single
+        path with a neighbor iterator per step, so memory only grows with
+        the depth of the current path, and since every path is reached by
+        exactly one sequence of choices no deduplication is needed.
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        path = ['start']
+        visits = Counter(path)
+        # for each cave on the path, whether it was the one small cave visited twice
+        repeats = [False]
+        used_twice = not allow_twice
+        next_caves = [iter(self.caves['start'])]
+        num_paths = 0
+
+        while next_caves:
+            next_cave = next(next_caves[-1], None)
+
+            if next_cave is None:
+                # backtrack
+                next_caves.pop()
+                visits[path.pop()] -= 1
+                if repeats.pop():
+                    used_twice = False
+            elif next_cave == 'end':
+                yield path + ['end']
+                num_paths += 1
+                if num_paths == limit:
+                    return
+            elif is_big(next_cave) or not visits[next_cave] or (not used_twice and next_cave != 'start'):
+                repeat = not is_big(next_cave) and visits[next_cave] > 0
+                used_twice = used_twice or repeat
+                path.append(next_cave)
+                visits[next_cave] += 1
+                repeats.append(repeat)
+                next_caves.append(iter(self.caves[next_cave]))
+
+    def count_paths(self, allow_twice: bool = False) -> int:
+        """
+        Counts the paths that find_all_paths (or find_all_paths2,
+        if allow_twice) would find, without building any of them.
+        Caves become integer ids, the visited small caves a bitmask,
+        and the count from each (cave, visited, used_twice) state is memoized.
+        """
+        names = list(self.caves)
+        ids = {name: i for i, name in enumerate(names)}
+        neighbors = [[ids[n] for n in self.caves[name]] for name in names]
+        big = [is_big(name) for name in names]
+        start, end = ids['start'], ids.get('end')
+
+        @lru_cache(maxsize=None)
+        def count(cave: int, visited: int, used_twice: bool) -> int:
+            if cave == end:
+                return 1
+            total = 0
+            for n in neighbors[cave]:
+                if big[n]:
+                    total += count(n, visited, used_twice)
+                elif not visited & (1 << n):
+                    total += count(n, visited | (1 << n), used_twice)
+                elif not used_twice and n != start:
+                    total += count(n, visited, True)
+            return total
+
+        return count(start, 1 << start, not allow_twice)
+
 
 CAVES1 = Caves.parse(RAW1)
 AP1 = CAVES1.find_all_paths()
 assert len(AP1) == 10 
 AP12 = CAVES1.find_all_paths2()
 assert len(AP12) == 36
+assert CAVES1.count_paths() == 10
+assert CAVES1.count_paths(allow_twice=True) == 36
+assert sorted(CAVES1.iter_paths()) == sorted(AP1)
+assert sorted(CAVES1.iter_paths(allow_twice=True)) == sorted(list(path) for path in AP12)
+assert len(list(CAVES1.iter_paths(allow_twice=True, limit=5))) == 5
 
 RAW2 = """dc-end
 HN-start
@@ -96,6 +173,8 @@ AP2 = CAVES2.find_all_paths()
 assert len(AP2) == 19
 AP12 = CAVES2.find_all_paths2()
 assert len(AP12) == 103
+assert CAVES2.count_paths() == 19
+assert CAVES2.count_paths(allow_twice=True) == 103
 
 RAW3 = """fs-end
 he-DX
@@ -120,6 +199,10 @@ AP3 = CAVES3.find_all_paths()
 assert len(AP3) == 226
 AP32 = CAVES3.find_all_paths2()
 assert len(AP32) == 3509
+assert CAVES3.count_paths() == 226
+assert CAVES3.count_paths(allow_twice=True) == 3509
+assert sum(1 for _ in CAVES3.iter_paths()) == 226
+assert sorted(CAVES3.iter_paths(allow_twice=True)) == sorted(list(path) for path in AP32)
 
 if __name__ == "__main__":
     raw = open('data/day12.txt').read()
@@ -127,4 +210,7 @@ if __name__ == "__main__":
     paths = caves.find_all_paths()
     print(f"Part 1: {len(paths)}")
     paths = caves.find_all_paths2()
-    print(f"Part 2: {len(paths)}")
\ No newline at end of file
+    print(f"Part 2: {len(paths)}")
+    print(f"Part 1: {caves.count_paths()}")
+    print(f"Part 2: {caves.count_paths(allow_twice=True)}")
+    print(f"Part 2: {sum(1 for _ in caves.iter_paths(allow_twice=True))}")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Tuple, List, Iterable, NamedTuple
+from typing import Tuple, List, Iterable, NamedTuple, Optional
 
 XY = Tuple[int, int]
 
@@ -63,6 +63,39 @@ class Transparency:
         else:
             raise ValueError(f"Unknown fold along {fold.fold_along}")
 
+    @staticmethod
+    def fold_table(size: int, folds_at: Iterable[int]) -> List[Optional[int]]:
+        """
+        Where each coordinate 0 .. size - 1 ends up after all of the folds
+        along one axis, or None if it falls on a fold line (and disappears)
+        """
+        table: List[Optional[int]] = list(range(size))
+        for at in folds_at:
+            table = [None if v is None or v == at else v if v < at else at - (v - at)
+                     for v in table]
+        return table
+
+    def fold_all(self, folds: Iterable[Fold]) -> None:
+        """
+        Same as applying each fold in turn, but the folds along each axis
+        are composed into a lookup table first, so each dot is moved once.
+        """
+        folds = list(folds)
+        for fold in folds:
+            if fold.fold_along not in ("x", "y"):
+                raise ValueError(f"Unknown fold along {fold.fold_along}")
+        if not self.dots:
+            return
+
+        x_table = self.fold_table(max(x for x, y in self.dots) + 1,
+                                  [fold.fold_at for fold in folds if fold.fold_along == "x"])
+        y_table = self.fold_table(max(y for x, y in self.dots) + 1,
+                                  [fold.fold_at for fold in folds if fold.fold_along == "y"])
+
+        self.dots = {(x_table[x], y_table[y])
+                     for x, y in self.dots
+                     if x_table[x] is not None and y_table[y] is not None}
+
     def num_dots(self) -> int:
         return len(self.dots)
 
@@ -108,6 +141,12 @@ TRANSPARENCY = Transparency.parse(RAW)
 FOLDS = get_folds(RAW)
 TRANSPARENCY.fold(FOLDS[0])
 assert TRANSPARENCY.num_dots() == 17
+TRANSPARENCY.fold(FOLDS[1])
+
+FOLDED = Transparency.parse(RAW)
+FOLDED.fold_all(FOLDS)
+assert FOLDED.dots == TRANSPARENCY.dots
+assert FOLDED.num_dots() == 16
 
 
 if __name__ == "__main__":
@@ -120,3 +159,8 @@ if __name__ == "__main__":
     for fold in folds[1:]:
         transparency.fold(fold)
     print(transparency)
+
+
+    transparency = Transparency.parse(raw)
+    transparency.fold_all(folds)
+    print(transparency)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Validates a (possibly huge) file of navigation subsystem lines with
+day10.validate_file, printing the total syntax error score, the median
+completion score and each worker's throughput:
+
+    python validate_day10.py lines.txt --workers 8 --batch-size 100000
+"""
+import argparse
+
+from day10 import validate_file
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="file with one line of brackets per line")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=100_000,
+                        help="lines per batch sent to a worker")
+    parser.add_argument("--max-kept", type=int, default=1_000_000,
+                        help="most completion scores held in memory to find the median")
+    args = parser.parse_args(argv)
+
+    validation, median = validate_file(args.path, args.workers, args.batch_size, args.max_kept)
+    print(f"lines: {validation.lines}")
+    print(f"syntax error score: {validation.error_score}")
+    print(f"median completion score: {median}")
+    for pid, (num_lines, seconds) in validation.workers.items():
+        print(f"worker {pid}: {num_lines} lines, {seconds:.3f}s scanning "
+              f"({num_lines / max(seconds, 1e-9):,.0f} lines/sec)")
+
+
+if __name__ == "__main__":
+    main()